@@ -0,0 +1,62 @@
+"""
+Combine the yearly hail, wind and tornado daily storm report files into one file per year
+Input:  {storm}_reports/combined/{prefix}_{year}_combined.csv (one per storm type)
+Output: Daily_combined/Daily_combined_{year}.parquet with an EVENT_TYPE column in front
+        (set WRITE_CSV = True to also write Daily_combined_{year}.csv for inspection)
+
+Uses the pyarrow CSV reader/writer (multithreaded) instead of a pandas round-trip
+"""
+
+import os
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+BASE_DIR = '/Users/jimnguyen/IRMII/SCS_API' #Set to your folder pathway
+OUTPUT_DIR = os.path.join(BASE_DIR, 'Daily_combined')
+os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+# Parquet is always written, CSV copies are only for looking at the data by hand
+WRITE_CSV = False
+
+# EVENT_TYPE is dictionary encoded (int8 codes + these labels), it reads back as a pandas category
+EVENT_TYPES = pa.array(['Hail', 'Wind', 'Tornado'], type=pa.string())
+
+# EVENT_TYPE label -> (combined folder, file prefix)
+STORM_FILES = {
+    'Hail': ('hail_reports/combined', 'hail'),
+    'Wind': ('wind_reports/combined', 'wind'),
+    'Tornado': ('tornado_reports/combined', 'torn'),
+}
+
+for year in range(2004, 2025):
+    tables = []
+
+    for event_type, (folder, prefix) in STORM_FILES.items():
+        inpath = os.path.join(BASE_DIR, folder, f"{prefix}_{year}_combined.csv")
+        if not os.path.isfile(inpath):
+            print(f"File not found: {inpath}")
+            continue
+
+        tbl = pacsv.read_csv(inpath)
+        code = EVENT_TYPES.to_pylist().index(event_type)
+        event_col = pa.DictionaryArray.from_arrays(np.full(tbl.num_rows, code, dtype=np.int8), EVENT_TYPES)
+        tbl = tbl.add_column(0, 'EVENT_TYPE', event_col)
+        tables.append(tbl)
+
+    if not tables:
+        print(f"Year {year}: no daily report files found")
+        continue
+
+    # Storm types carry different columns (Size / Speed / F-Scale), missing ones are filled with nulls
+    combined = pa.concat_tables(tables, promote_options='permissive')
+
+    outpath = os.path.join(OUTPUT_DIR, f"Daily_combined_{year}.parquet")
+    pq.write_table(combined, outpath, compression='zstd')
+
+    if WRITE_CSV:
+        csv_table = combined.set_column(0, 'EVENT_TYPE', combined['EVENT_TYPE'].cast(pa.string()))
+        pacsv.write_csv(csv_table, os.path.join(OUTPUT_DIR, f"Daily_combined_{year}.csv"))
+
+    print(f"Year {year}: {combined.num_rows} rows -> {outpath}")
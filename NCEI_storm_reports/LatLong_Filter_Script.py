@@ -1,10 +1,14 @@
 import os
 import pandas as pd
+import numpy as np
 
 DATA_DIR = '/Users/jimnguyen/IRMII/SCS_API/NCEI_storm_reports'
 OUTPUT_DIR = os.path.join(DATA_DIR, 'filtered')
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Parquet is always written, the CSV copy is still read by the Vertification notebooks
+WRITE_CSV = True
+
 KEEP_TYPES = [
     'Tornado',
     'Wind',
@@ -27,29 +31,41 @@ COLUMNS_TO_KEEP = [
     'BEGIN_LON',
     'END_LAT',
     'END_LON',
-    '',
 ]
 
+MONTH_LOOKUP = {m: i for i, m in enumerate(['January', 'February', 'March', 'April', 'May', 'June', 'July',
+                                            'August', 'September', 'October', 'November', 'December'], start=1)}
+
+# Narrow dtypes for the columns we parse
+READ_DTYPES = {
+    'EVENT_TYPE': 'category',
+    'YEAR': 'int16',
+    'BEGIN_DAY': 'int8',
+    'END_DAY': 'int8',
+    'BEGIN_LAT': 'float32',
+    'BEGIN_LON': 'float32',
+    'END_LAT': 'float32',
+    'END_LON': 'float32',
+}
+
 for year in range(2010, 2025):
     infile = f"Storm_Reports_{year}.csv"
     inpath = os.path.join(DATA_DIR, infile)
     if not os.path.isfile(inpath):
         continue
 
-    df = pd.read_csv(inpath)
-
-    #Only keep the SCS events
-    df_twh = df[df['EVENT_TYPE'].isin(KEEP_TYPES)].copy()
+    # Only parse the columns we keep
+    df = pd.read_csv(inpath, usecols=lambda c: c in COLUMNS_TO_KEEP, dtype=READ_DTYPES, engine='c')
 
     #Columns of concern to compare for now
-    cols_existing = [c for c in COLUMNS_TO_KEEP if c in df_twh.columns]
-    df_twh = df_twh[cols_existing]
+    cols_existing = [c for c in COLUMNS_TO_KEEP if c in df.columns]
+
+    #Only keep the SCS events, matched on category codes (code -1 = missing type -> dropped)
+    keep_codes = np.append(df['EVENT_TYPE'].cat.categories.isin(KEEP_TYPES), False)
+    df_twh = df.loc[keep_codes[df['EVENT_TYPE'].cat.codes.to_numpy()], cols_existing]
 
     #Convert month alpha to numeric
-    df_twh['MONTH_NUM'] = pd.to_datetime(
-        df_twh['MONTH_NAME'], 
-        format='%B'
-    ).dt.month
+    df_twh['MONTH_NUM'] = df_twh['MONTH_NAME'].map(MONTH_LOOKUP).astype('int8')
     
 
     #Sort
@@ -61,8 +77,10 @@ for year in range(2010, 2025):
     #to drop month number if you want
     #df_twh = df_twh.drop(columns='MONTH_NUM')
 
-    outfile = f"Storm_Reports_{year}_latlong.csv"
-    outpath = os.path.join(OUTPUT_DIR, outfile)
-    df_twh.to_csv(outpath, index=False)
+    outpath = os.path.join(OUTPUT_DIR, f"Storm_Reports_{year}_latlong.parquet")
+    df_twh.to_parquet(outpath, compression='zstd', engine='pyarrow', index=False)
+
+    if WRITE_CSV:
+        df_twh.to_csv(os.path.join(OUTPUT_DIR, f"Storm_Reports_{year}_latlong.csv"), index=False)
 
     print(f"Year {year}: {len(df_twh)} rows -> {outpath}")
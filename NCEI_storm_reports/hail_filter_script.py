@@ -6,6 +6,9 @@ DATA_DIR = '/Users/jimnguyen/IRMII/SCS_API/NCEI_storm_reports'
 OUTPUT_DIR = os.path.join(DATA_DIR, 'hail_filtered')
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Parquet is always written, the CSV copy is still read by the PPH/validation notebooks
+WRITE_CSV = True
+
 KEEP_TYPES = ['Hail']
 
 COLUMNS_TO_KEEP = [
@@ -19,6 +22,16 @@ COLUMNS_TO_KEEP = [
     'MAGNITUDE'
 ]
 
+# Narrow dtypes for the columns we parse
+READ_DTYPES = {
+    'EVENT_TYPE': 'category',
+    'BEGIN_LAT': 'float32',
+    'BEGIN_LON': 'float32',
+    'END_LAT': 'float32',
+    'END_LON': 'float32',
+    'MAGNITUDE': 'float32',
+}
+
 for year in range(2010, 2025):
     infile = f"Storm_Reports_{year}.csv"
     inpath = os.path.join(DATA_DIR, infile)
@@ -27,19 +40,20 @@ for year in range(2010, 2025):
         print(f"File not found: {inpath}")
         continue
     
-    df = pd.read_csv(inpath)
+    # Only parse the columns we keep
+    df = pd.read_csv(inpath, usecols=lambda c: c in COLUMNS_TO_KEEP, dtype=READ_DTYPES, engine='c')
     
-    # Only keep the hail events
-    df_hail = df[df['EVENT_TYPE'].isin(KEEP_TYPES)].copy()
+    # Filter for columns that exist
+    cols_existing = [c for c in COLUMNS_TO_KEEP if c in df.columns]
+
+    # Only keep the hail events, matched on category codes (code -1 = missing type -> dropped)
+    keep_codes = np.append(df['EVENT_TYPE'].cat.categories.isin(KEEP_TYPES), False)
+    df_hail = df.loc[keep_codes[df['EVENT_TYPE'].cat.codes.to_numpy()], cols_existing]
     
     if len(df_hail) == 0:
         print(f"Year {year}: No hail events found")
         continue
     
-    # Filter for columns that exist
-    cols_existing = [c for c in COLUMNS_TO_KEEP if c in df_hail.columns]
-    df_hail = df_hail[cols_existing]
-    
     # Convert numeric columns to proper types
     df_hail['BEGIN_LAT'] = pd.to_numeric(df_hail['BEGIN_LAT'], errors='coerce')
     df_hail['BEGIN_LON'] = pd.to_numeric(df_hail['BEGIN_LON'], errors='coerce')
@@ -70,9 +84,11 @@ for year in range(2010, 2025):
     # df_hail = df_hail.drop(columns=['BEGIN_LAT', 'BEGIN_LON', 'END_LAT', 'END_LON'])
     
     # Save the filtered data
-    outfile = f"Hail_Reports_{year}.csv"
-    outpath = os.path.join(OUTPUT_DIR, outfile)
-    df_hail.to_csv(outpath, index=False)
+    outpath = os.path.join(OUTPUT_DIR, f"Hail_Reports_{year}.parquet")
+    df_hail.to_parquet(outpath, compression='zstd', engine='pyarrow', index=False)
+
+    if WRITE_CSV:
+        df_hail.to_csv(os.path.join(OUTPUT_DIR, f"Hail_Reports_{year}.csv"), index=False)
     
 
     print(f"  - Saved to: {outpath}")
\ No newline at end of file
@@ -0,0 +1,47 @@
+"""
+One-shot conversion of the daily PPH CSV files into a single HDF5 store per PPH folder
+Reading thousands of tiny CSVs is parser-bound, the store lets
+calculate_mean_annual_days (PPH_NCEI.ipynb) pull each day without re-parsing text
+
+NCEI_PPH/hail/pph_YYYY_MM_DD.csv        -> NCEI_PPH.h5    key /hail/pph_YYYY_MM_DD
+Sighail_PPH/sighail/pph_YYYY_MM_DD.csv  -> Sighail_PPH.h5 key /sighail/pph_YYYY_MM_DD
+
+Re-run after regenerating the PPH CSVs, the store is rebuilt from scratch
+Requires PyTables (pip install tables)
+"""
+
+import os
+import pandas as pd
+
+PPH_DIR = '/Users/jimnguyen/IRMII/SCS_API/PPH' #Set to your folder pathway
+
+PPH_FOLDERS = [
+    'NCEI_PPH',
+    'Sighail_PPH'
+]
+
+for folder in PPH_FOLDERS:
+    folder_path = os.path.join(PPH_DIR, folder)
+    if not os.path.isdir(folder_path):
+        print(f"Folder not found: {folder_path}")
+        continue
+
+    store_path = os.path.join(PPH_DIR, f"{folder}.h5")
+
+    with pd.HDFStore(store_path, mode='w', complib='blosc:zstd', complevel=5) as store:
+        for storm_type in sorted(os.listdir(folder_path)):
+            storm_path = os.path.join(folder_path, storm_type)
+            if not os.path.isdir(storm_path):
+                continue
+
+            file_names = sorted(f for f in os.listdir(storm_path)
+                                if f.startswith('pph_') and f.endswith('.csv'))
+
+            for file_name in file_names:
+                df = pd.read_csv(os.path.join(storm_path, file_name))
+                key = f"/{storm_type}/{file_name[:-len('.csv')]}"
+                store.put(key, df, format='fixed')
+
+            print(f"{folder}/{storm_type}: {len(file_names)} days -> {store_path}")
+
+print("PPH HDF5 conversion complete!")
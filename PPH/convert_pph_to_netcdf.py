@@ -0,0 +1,81 @@
+"""
+One-shot conversion of the daily PPH CSV files into one time-stacked NetCDF per storm type
+With every day in a single (time, y, x) array, load_pph_stack (PPH_NCEI.ipynb) reads a whole
+period in one call and calculate_mean_annual_days thresholds it without touching the CSVs
+
+NCEI_PPH/hail/pph_YYYY_MM_DD.csv        -> NCEI_PPH_hail.nc        variable pph(time, y, x)
+Sighail_PPH/sighail/pph_YYYY_MM_DD.csv  -> Sighail_PPH_sighail.nc  variable pph(time, y, x)
+
+If the PPH notebook already wrote a pph_YYYY.nc for every year in PPH_YEARS they are
+concatenated instead of re-parsing the CSVs, a partial set falls back to the CSVs
+Re-run after regenerating the PPH CSVs, the files are rebuilt from scratch
+"""
+
+import os
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+PPH_DIR = '/Users/jimnguyen/IRMII/SCS_API/PPH' #Set to your folder pathway
+
+PPH_FOLDERS = [
+    'NCEI_PPH',
+    'Sighail_PPH'
+]
+
+# Years written by run_pph (pph_core.py), the yearly files are only used when all are present
+PPH_YEARS = range(2010, 2025)
+
+for folder in PPH_FOLDERS:
+    folder_path = os.path.join(PPH_DIR, folder)
+    if not os.path.isdir(folder_path):
+        print(f"Folder not found: {folder_path}")
+        continue
+
+    for storm_type in sorted(os.listdir(folder_path)):
+        storm_path = os.path.join(folder_path, storm_type)
+        if not os.path.isdir(storm_path):
+            continue
+
+        # pph_YYYY.nc from PPH_NCEI.ipynb, already (time, y, x) per year
+        year_files = [os.path.join(storm_path, f"pph_{year}.nc") for year in PPH_YEARS]
+        missing = [path for path in year_files if not os.path.exists(path)]
+        if missing and len(missing) < len(year_files):
+            print(f"{folder}/{storm_type}: {len(missing)} yearly files missing, using the daily CSVs")
+        if not missing:
+            # Opened one year at a time, open_mfdataset would need dask
+            year_datasets = []
+            for path in year_files:
+                with xr.open_dataset(path) as year_ds:
+                    year_datasets.append(year_ds.load())
+            ds = xr.concat(year_datasets, dim='time')
+            nc_path = os.path.join(PPH_DIR, f"{folder}_{storm_type}.nc")
+            ds.to_netcdf(nc_path, encoding={'pph': {'zlib': True, 'complevel': 4,
+                                                    'chunksizes': (1,) + ds['pph'].shape[1:]}})
+            print(f"{folder}/{storm_type}: {ds.sizes['time']} days -> {nc_path}")
+            continue
+
+        file_names = sorted(f for f in os.listdir(storm_path)
+                            if f.startswith('pph_') and f.endswith('.csv'))
+        if not file_names:
+            continue
+
+        # pph_YYYY_MM_DD.csv -> date of the 1200z period
+        times = pd.to_datetime([f[len('pph_'):-len('.csv')] for f in file_names], format='%Y_%m_%d')
+
+        first = pd.read_csv(os.path.join(storm_path, file_names[0])).to_numpy(dtype=np.float32)
+        stacked = np.zeros((len(file_names),) + first.shape, dtype=np.float32)
+        stacked[0] = first
+        for i, file_name in enumerate(file_names[1:], start=1):
+            stacked[i] = pd.read_csv(os.path.join(storm_path, file_name)).to_numpy(dtype=np.float32)
+
+        ds = xr.Dataset({'pph': (('time', 'y', 'x'), stacked)}, coords={'time': times})
+
+        # One chunk per day so a date range reads only the days it covers
+        nc_path = os.path.join(PPH_DIR, f"{folder}_{storm_type}.nc")
+        ds.to_netcdf(nc_path, encoding={'pph': {'zlib': True, 'complevel': 4,
+                                                'chunksizes': (1,) + first.shape}})
+
+        print(f"{folder}/{storm_type}: {len(file_names)} days -> {nc_path}")
+
+print("PPH NetCDF conversion complete!")
@@ -0,0 +1,402 @@
+"""
+Shared PPH generation for the NCEI report files, used by the hail and sighail cells of PPH_NCEI.ipynb
+The grid, the per-day PPH step and the writers are also used by the nam212 cell of
+Vertification/Outlooks_and_events.ipynb
+1200z Day1 to 1200z Day2 time windows, file names use Day1
+Every period gets a file, all zeros when there are no events
+Events count for every 1200z-1200z period between BEGIN_DATE_TIME and END_DATE_TIME
+
+    from pph_core import run_pph
+    run_pph("NCEI_storm_reports/hail_filtered/Hail_Reports_{year}.csv", {"Hail": "hail"}, "NCEI_PPH")
+
+Kernel and grid settings are changed here once for every report set, output options are
+run_pph arguments
+"""
+
+import numpy as np
+import os
+import pandas as pd
+import xarray as xr
+import calendar
+from datetime import datetime
+from scipy.spatial import cKDTree
+from scipy.ndimage import gaussian_filter
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import math
+import io
+
+# numexpr evaluates the tree path's exp multithreaded in one fused pass, numpy is used without it
+try:
+    import numexpr as ne
+    NUMEXPR_AVAILABLE = True
+except ImportError:
+    NUMEXPR_AVAILABLE = False
+
+# numba compiles the whole per-day kernel, preferred over the tree path when installed
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+sigma_grid_units = 1.5
+grid_spacing_km = 40.0   
+
+# NAM-212 grid, from https://github.com/ahaberlie/PPer_Climo/tree/master/data
+grid_path = "/Users/jimnguyen/IRMII/SCS_API/PPH/nam212.nc" #Set to your folder pathway
+
+def load_grid(grid_path):
+    """
+    NAM-212 lat/lon as float32 (ny, nx) arrays
+    Saved as one (2, ny, nx) array next to the NetCDF after the first run, later runs memory map it
+    instead of opening and decoding the NetCDF
+    """
+    grid_cache_path = os.path.splitext(grid_path)[0] + "_latlon_float32.npy"
+    if os.path.exists(grid_cache_path):
+        grid_lat, grid_lon = np.load(grid_cache_path, mmap_mode='r')
+    else:
+        with xr.open_dataset(grid_path) as grid_ds:
+            # float32 is plenty for the kernel, the output is only meaningful to ~5 significant figures
+            grid_lat = grid_ds["gridlat_212"].values.astype(np.float32)
+            grid_lon = grid_ds["gridlon_212"].values.astype(np.float32)
+        np.save(grid_cache_path, np.stack([grid_lat, grid_lon]))
+    return grid_lat, grid_lon
+
+try:
+    grid212_lat, grid212_lon = load_grid(grid_path)  # (ny, nx) each
+    print(f"Loaded grid with shape: {grid212_lat.shape}")
+except Exception as e:
+    print(f"Error loading grid file: {e}")
+    raise
+
+# Reports only contribute to grid points near them: past 8 sigma the kernel is below 1e-14,
+# far under the 1e-10 the output is rounded to, so each report is only evaluated on the
+# grid points inside that radius, found through a KD-tree built once on the grid
+kernel_cutoff_km = 8.0 * sigma_grid_units * grid_spacing_km
+
+# exp(-0.5 * (d_km / grid_spacing_km / sigma)^2) folded into exp(-d_km^2 * kernel_exp_scale)
+kernel_exp_scale = 1.0 / (2.0 * sigma_grid_units**2 * grid_spacing_km**2)
+gauss_pref = 1.0 / (2.0 * np.pi * sigma_grid_units**2)
+
+# Optional table lookup in place of exp on the tree path (run_pph(use_kernel_lut=True)): exp(-t)
+# tabulated for t up to the cutoff (t = 32 at 8 sigma) every KERNEL_LUT_STEP, with a trailing 0
+# for pairs past it. Nearest-entry lookup is off by up to ~KERNEL_LUT_STEP/2 relative, so it is opt-in
+KERNEL_LUT_STEP = 1e-4
+kernel_lut = np.append(np.exp(-np.arange(0.0, kernel_cutoff_km**2 * kernel_exp_scale + KERNEL_LUT_STEP,
+                                         KERNEL_LUT_STEP)), 0.0).astype(np.float32)
+
+grid212_lat_flat = grid212_lat.ravel()
+grid212_lon_flat = grid212_lon.ravel()
+grid_tree = cKDTree(np.column_stack([grid212_lat_flat, grid212_lon_flat]))
+
+# Squared distance function for PPH, cos(report_lat) is computed once per report by the caller
+def squared_distance_km2(grid_lat, grid_lon, report_lat, report_cos_lat, report_lon):
+    lat_km = 111.32 * (grid_lat - report_lat)
+    lon_km = 111.32 * report_cos_lat * (grid_lon - report_lon)
+    return lat_km**2 + lon_km**2
+
+def accumulate_gaussian_tree(report_lats, report_lons, gaussian_sum, use_lut=False):
+    """Add every report's Gaussian kernel to gaussian_sum, evaluated only on the grid points near it"""
+    # The tree works in degrees, dividing by cos(lat) widens the radius so every
+    # grid point within kernel_cutoff_km (east-west km shrink with latitude) is found
+    report_cos_lats = np.cos(np.radians(report_lats))
+    radii = kernel_cutoff_km / (111.32 * report_cos_lats)
+    neighbours = grid_tree.query_ball_point(np.column_stack([report_lats, report_lons]), r=radii)
+
+    # Every (report, nearby grid point) pair is evaluated in one broadcast
+    counts = np.fromiter((len(idx) for idx in neighbours), dtype=np.intp, count=len(neighbours))
+    grid_idx = np.concatenate([np.asarray(idx, dtype=np.intp) for idx in neighbours])
+    report_idx = np.repeat(np.arange(len(neighbours)), counts)
+
+    d_km2 = squared_distance_km2(
+        grid212_lat_flat[grid_idx], grid212_lon_flat[grid_idx],
+        report_lats[report_idx], report_cos_lats[report_idx], report_lons[report_idx]
+    )
+
+    # Summing the Nth terms, pairs landing on the same grid point are added by bincount.
+    # Without numexpr the kernel is scaled and exponentiated in place in d_km2's buffer
+    if use_lut:
+        lut_idx = np.rint(d_km2 * (kernel_exp_scale / KERNEL_LUT_STEP)).astype(np.intp)
+        kernel_vals = kernel_lut[np.minimum(lut_idx, len(kernel_lut) - 1)]
+    elif NUMEXPR_AVAILABLE:
+        kernel_vals = ne.evaluate("exp(-d_km2 * scale)",
+                                  local_dict={'d_km2': d_km2, 'scale': np.float32(kernel_exp_scale)})
+    else:
+        kernel_vals = np.multiply(d_km2, -kernel_exp_scale, out=d_km2)
+        np.exp(kernel_vals, out=kernel_vals)
+    gaussian_sum += np.bincount(grid_idx, weights=kernel_vals,
+                                minlength=grid212_lat_flat.size).reshape(gaussian_sum.shape)
+
+if NUMBA_AVAILABLE:
+    # Compiled alternative to the tree path: grid rows are spread across cores and each grid point
+    # loops over the day's reports, skipping any report past the kernel cutoff
+    @njit(parallel=True, cache=True)
+    def accumulate_gaussian_jit(grid_lat, grid_lon, report_lats, report_cos_lats, report_lons,
+                                exp_scale, cutoff_km, gaussian_sum):
+        ny, nx = grid_lat.shape
+        cutoff_km2 = cutoff_km * cutoff_km
+        for i in prange(ny):
+            for j in range(nx):
+                total = 0.0
+                for k in range(report_lats.shape[0]):
+                    lat_km = 111.32 * (grid_lat[i, j] - report_lats[k])
+                    # Bounding-box reject: reports already too far north/south skip the east-west term
+                    if lat_km * lat_km > cutoff_km2:
+                        continue
+                    lon_km = 111.32 * report_cos_lats[k] * (grid_lon[i, j] - report_lons[k])
+                    d_km2 = lat_km * lat_km + lon_km * lon_km
+                    if d_km2 > cutoff_km2:
+                        continue
+                    total += math.exp(-d_km2 * exp_scale)
+                gaussian_sum[i, j] += total
+
+def parse_datetime_string(dt_string):
+    """Parse datetime string to datetime object"""
+    if pd.isna(dt_string) or dt_string == '' or dt_string is None:
+        return None
+    
+    try:
+        formats = [
+            '%d-%b-%y %H:%M:%S',      # 01-APR-24 04:06:00 
+        ]
+        
+        dt_string = str(dt_string).strip()
+        
+        # Try each format
+        for i, fmt in enumerate(formats):
+            try:
+                parsed = datetime.strptime(dt_string, fmt)
+                return parsed
+            except ValueError:
+                continue
+        
+        return None
+        
+    except Exception as e:
+        return None
+
+def events_overlapping_1200z_period(begin_dts, end_dts, period_year, period_month, period_day):
+    """
+    Boolean mask of the events (begin_dts to end_dts, datetime64 arrays) that overlap
+    with a 1200z-1200z period. Period runs from period_day 1200z to (period_day+1) 1200z.
+    Events without an end time are treated as instantaneous.
+    """
+    # Create period boundaries, timedelta handles month/year rollover
+    period_start = np.datetime64(datetime(period_year, period_month, period_day, 12, 0))  # 1200z Day1
+    period_end = period_start + np.timedelta64(1, 'D')  # 1200z Day2
+    
+    # Check for overlap: events overlap if event_start < period_end AND event_end > period_start
+    return (begin_dts < period_end) & (end_dts > period_start)
+
+# Daily CSVs keep the 0..nx-1 header the readers expect, values are written to 5 significant
+# figures with np.savetxt instead of going through a DataFrame
+pph_csv_header = ','.join(str(i) for i in range(grid212_lat.shape[1]))
+
+def write_pph_csv(file_obj, pph_grid):
+    np.savetxt(file_obj, pph_grid, delimiter=',', fmt='%.4e', header=pph_csv_header, comments='')
+
+# Most days have no reports, their all-zero CSV is formatted once and the text reused
+zero_pph_buf = io.StringIO()
+write_pph_csv(zero_pph_buf, np.zeros(grid212_lat.shape, dtype=np.float32))
+zero_pph_csv = zero_pph_buf.getvalue()
+
+# Default run_pph thread count. Years read their own report file and write their own days, so
+# they run on a thread pool. The heavy parts (CSV parsing, the KD-tree query and numpy kernels)
+# release the GIL
+N_WORKERS = min(8, os.cpu_count() or 1)
+
+# The default numba threading layer does not allow concurrent calls into parallel kernels
+numba_lock = threading.Lock()
+
+def accumulate_gaussian_filter(report_lats, report_lons, gaussian_sum):
+    """Add the day's reports to gaussian_sum as grid-point counts convolved with the Gaussian"""
+    _, nearest = grid_tree.query(np.column_stack([report_lats, report_lons]))
+    counts = np.bincount(nearest, minlength=grid212_lat_flat.size).reshape(gaussian_sum.shape)
+    # gaussian_filter's weights sum to 1, the kernel sum over the grid is 2*pi*sigma^2 (in grid units)
+    smoothed = gaussian_filter(counts.astype(np.float32), sigma=sigma_grid_units, mode='constant', truncate=8.0)
+    gaussian_sum += smoothed * (2.0 * np.pi * sigma_grid_units**2)
+
+def compute_day_pph(report_lats, report_lons, gaussian_sum, method='exact', use_kernel_lut=False):
+    """
+    Turn one period's reports into PPH in place on gaussian_sum (zeroed by the caller)
+    method: 'exact' evaluates the kernel at each report's true location (compiled when numba is
+            installed, otherwise through the grid KD-tree), 'filter' snaps reports to their nearest
+            grid point and smooths the counts with gaussian_filter, treating the grid as uniform 40 km
+    """
+    if method == 'filter':
+        accumulate_gaussian_filter(report_lats, report_lons, gaussian_sum)
+    elif NUMBA_AVAILABLE:
+        with numba_lock:
+            accumulate_gaussian_jit(grid212_lat, grid212_lon, report_lats, np.cos(np.radians(report_lats)),
+                                    report_lons, kernel_exp_scale, kernel_cutoff_km, gaussian_sum)
+    else:
+        accumulate_gaussian_tree(report_lats, report_lons, gaussian_sum, use_lut=use_kernel_lut)
+
+    # Apply prefactor: (1 / (2π σ²)) and round, in place on the accumulator
+    np.multiply(gaussian_sum, gauss_pref, out=gaussian_sum)
+    np.round(gaussian_sum, 10, out=gaussian_sum)
+    return gaussian_sum
+
+def save_pph_csv(output_file, pph_grid):
+    """Write one period's PPH grid, all-zero periods reuse the preformatted zero CSV"""
+    if pph_grid.any():
+        write_pph_csv(output_file, pph_grid)
+    else:
+        with open(output_file, 'w') as f:
+            f.write(zero_pph_csv)
+
+def save_pph_year(nc_file, year_dates, year_pph):
+    """Write a year of PPH as one compressed (time, y, x) NetCDF"""
+    # One chunk per day so readers can pull single days without decompressing the year
+    ds = xr.Dataset({'pph': (('time', 'y', 'x'), year_pph)}, coords={'time': year_dates})
+    try:
+        ds.to_netcdf(nc_file, encoding={'pph': {'zlib': True, 'complevel': 4, 'dtype': 'float32',
+                                                'chunksizes': (1,) + grid212_lat.shape}})
+        print(f"    Saved {nc_file}")
+    except Exception as e:
+        print(f"    Error saving {nc_file}: {e}")
+
+def process_year(year, report_file, storm_types, output_folder, write_csv=True, use_kernel_lut=False):
+    """Compute and save every 1200z-1200z period of one year for each storm type"""
+    file_path = report_file.format(year=year)
+    
+    # Initialize data as empty DataFrame in case file doesn't exist
+    data = pd.DataFrame()
+    
+    if not os.path.exists(file_path):
+        print(f"File does not exist: {file_path} - Will create zero files for all dates")
+    else:
+        try:
+            print(f"\nProcessing {file_path}...")
+            
+            # Read the data
+            data = pd.read_csv(file_path)
+            
+            # Clean and convert data types
+            data['LAT'] = pd.to_numeric(data['LAT'], errors='coerce')
+            data['LON'] = pd.to_numeric(data['LON'], errors='coerce')
+            
+            # Parse datetime strings
+            data['BEGIN_DT'] = data['BEGIN_DATE_TIME'].apply(parse_datetime_string)
+            data['END_DT'] = data['END_DATE_TIME'].apply(parse_datetime_string)
+            
+            # Debug datetime parsing
+            parsed_count = data['BEGIN_DT'].notna().sum()
+            print(f"  Successfully parsed datetimes: {parsed_count} / {len(data)}")
+            
+            if parsed_count == 0:
+                print("  ERROR: NO DATETIMES PARSED SUCCESSFULLY!")
+                print("  Sample datetime strings:", data['BEGIN_DATE_TIME'].head(3).tolist())
+                return  # Skip this year since datetime parsing completely failed
+            
+            # Remove rows with missing critical data
+            initial_count = len(data)
+            data = data.dropna(subset=['LAT', 'LON', 'BEGIN_DATE_TIME'])
+            # Also remove rows where datetime parsing failed
+            data = data[data['BEGIN_DT'].notna()]
+            
+            if len(data) < initial_count:
+                print(f"  Removed {initial_count - len(data)} rows with missing/invalid data")
+
+            # Filter to CONUS bounds
+            conus_data = data[(data['LAT'] >= 24.52) & (data['LAT'] <= 49.385) &
+                             (data['LON'] >= -124.74) & (data['LON'] <= -66.95)]
+
+            if len(conus_data) < len(data):
+                print(f"  Filtered {len(data) - len(conus_data)} reports outside CONUS")
+            
+            data = conus_data
+
+        except Exception as e:
+            print(f"Error reading file {file_path}: {e}")
+            data = pd.DataFrame()  # Use empty DataFrame if file read fails
+
+    # Process each storm type
+    for event_type, storm_type in storm_types.items():
+        print(f"  Processing {event_type} reports for {year}...")
+        
+        # Filter data for this storm type (will be empty if no data loaded)
+        if len(data) > 0:
+            # Filter for hail events
+            storm_data = data[data['EVENT_TYPE'] == event_type].copy() if 'EVENT_TYPE' in data.columns else data.copy()
+            print(f"    Found {len(storm_data)} {event_type} reports")
+        else:
+            storm_data = pd.DataFrame()
+            print(f"    No data available - creating zero files for all dates")
+        
+        # Event times as datetime64 arrays, compared against every period without touching the rows
+        if len(storm_data) > 0:
+            begin_dts = pd.to_datetime(storm_data['BEGIN_DT']).to_numpy()
+            end_dts = pd.to_datetime(storm_data['END_DT']).fillna(pd.to_datetime(storm_data['BEGIN_DT'])).to_numpy()
+        
+        # Get output subfolder for this storm type
+        output_subfolder = os.path.join(output_folder, storm_type)
+        
+        # Every period of the year is kept here and written to NetCDF once the year is done
+        year_dates = pd.date_range(f"{year}-01-01", f"{year}-12-31", freq='D')
+        year_pph = np.zeros((len(year_dates),) + grid212_lat.shape, dtype=np.float32)
+        day_index = 0
+        
+        # Process each month (always process all 12 months)
+        for month in range(1, 13):
+            # Determine number of days in this month
+            days_in_month = calendar.monthrange(year, month)[1]
+            
+            # Process each day in the month (ALWAYS process all days)
+            # Each day represents the start of a 1200z-1200z period
+            for day in range(1, days_in_month + 1):
+                
+                # Find all events that overlap with this 1200z-1200z period
+                if len(storm_data) > 0:
+                    day_data = storm_data[events_overlapping_1200z_period(begin_dts, end_dts, year, month, day)]
+                else:
+                    day_data = pd.DataFrame()
+                
+                # The day's slice of the zeroed year array is the accumulator
+                gaussian_sum = year_pph[day_index]
+
+                # Compute the PPH if there's data for this period, otherwise the slice stays all zeros
+                if len(day_data) > 0:
+                    compute_day_pph(day_data['LAT'].to_numpy(dtype=np.float32), day_data['LON'].to_numpy(dtype=np.float32),
+                                    gaussian_sum, use_kernel_lut=use_kernel_lut)
+                    print(f"    Calculated PPH for {storm_type} period {year}-{month:02d}-{day:02d} 1200z to {year}-{month:02d}-{day+1:02d} 1200z ({len(day_data)} reports)")
+                else:
+                    print(f"    Created zero PPH for {storm_type} period {year}-{month:02d}-{day:02d} 1200z to next day 1200z (0 reports)")
+                day_index += 1
+
+                # Saving (ALWAYS save, even if all zeros)
+                # File name uses Day1 of the period
+                if write_csv:
+                    file_name_out = f"pph_{year}_{month:02d}_{day:02d}.csv"
+                    output_file = os.path.join(output_subfolder, file_name_out)
+
+                    try:
+                        save_pph_csv(output_file, gaussian_sum)
+                    except Exception as e:
+                        print(f"    Error saving PPH for {year}-{month:02d}-{day:02d}: {e}")
+                        continue
+        
+        save_pph_year(os.path.join(output_subfolder, f"pph_{year}.nc"), year_dates, year_pph)
+
+def run_pph(report_file, storm_types, output_folder, years=range(2010, 2025),
+            write_csv=True, use_kernel_lut=False, n_workers=N_WORKERS):
+    """
+    Generate PPH for every year in years
+    report_file: NCEI report CSV path with a {year} field
+    storm_types: EVENT_TYPE -> output subfolder name
+    output_folder: written as output_folder/<storm_type>/pph_YYYY.nc, one compressed (time, y, x)
+                   NetCDF per year, and pph_YYYY_MM_DD.csv for the readers that expect daily CSVs
+    write_csv: False writes only the yearly NetCDF
+    use_kernel_lut: tabulated exp on the tree path, only used when numba is not installed
+    n_workers: years processed at once
+    """
+    # Create output subfolders for each storm type
+    for storm_type in storm_types.values():
+        os.makedirs(os.path.join(output_folder, storm_type), exist_ok=True)
+
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        list(executor.map(lambda year: process_year(year, report_file, storm_types, output_folder,
+                                                    write_csv, use_kernel_lut), years))
+
+    print(f"\nPPH processing complete: {output_folder}")
@@ -6,7 +6,7 @@ Created on Mon Apr 28 13:38:26 2025
 
 The objective of this script is to download the Strom Reports data from 1950-2024. 
 The data are downloaded as individual zip files for each year. 
-The files are unziped and the zipped files are deleted (Optional Key-Flag)
+The files are unzipped as they download, so no zipped copies are kept on disk
 A single CSV file is compiled which consists of the Hail, Tornado and other reports from 1950-2021
 
 The following will be customized
@@ -29,9 +29,12 @@ To Dos:-
 # Load necessary libraries
 import os
 import requests
+from requests.adapters import HTTPAdapter
 import gzip
 import shutil
+import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm  # For progress tracking
 
 
@@ -55,8 +58,13 @@ else:
 start_year = 1950
 end_year = 2025
 
-# Loop through each year to download and process data
-for year in range(start_year, end_year):
+# Each year is an independent download, so several years stream at once over one pooled session
+N_WORKERS = 8
+session = requests.Session()
+session.mount('https://', HTTPAdapter(pool_connections=N_WORKERS, pool_maxsize=N_WORKERS))
+
+def fetch_year(year):
+    """Download one year of storm reports and decompress it straight into its CSV"""
 
     # Construct the URL for the current year
     base_url = "https://www.ncei.noaa.gov/pub/data/swdi/stormevents/csvfiles/"
@@ -72,66 +80,59 @@ for year in range(start_year, end_year):
     # Combine the URLs
     year_url = base_url + file_pattern
 
-    # File paths
-    zip_file = f"NCEI_Storm_Reports/StormEvents_{year}.csv.gz"
+    # File path
     csv_file = f"NCEI_Storm_Reports/Storm_Reports_{year}.csv"
 
-    # Try to download the file
-    try:
-        # Download the file
-        print(f"Downloading data for {year}...")
-        response = requests.get(year_url, stream=True)
+    # Download the file
+    with session.get(year_url, stream=True, timeout=60) as response:
         response.raise_for_status()  # Raise an exception for HTTP errors
 
-        # Save the downloaded file
-        with open(zip_file, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-
-        # Extract the gzipped file
-        with gzip.open(zip_file, 'rb') as f_in:
+        # The gzip stream is decompressed as it arrives, no .csv.gz is written to disk
+        with gzip.GzipFile(fileobj=response.raw) as f_in:
             with open(csv_file, 'wb') as f_out:
                 shutil.copyfileobj(f_in, f_out)
 
-        print(f"Successfully downloaded and processed data for {year}")
-
-    except Exception as e:
-        # If there's an error (e.g., file not found), print a message
-        print(f"Error processing year {year}: {str(e)}")
-
-print("Download process completed.")
-
-#%% Identity the event types across the years 
-# The goal is to identify the event types assocaited with SCS events.
-event_types_by_year = set()
-
-for year in range(start_year, end_year):
-
-    print(year)
+    return year
 
-    # Read the CSV file
-    reports = pd.read_csv(f"NCEI_Storm_Reports/Storm_Reports_{year}.csv")
+# Loop through each year to download and process data
+with ThreadPoolExecutor(max_workers=N_WORKERS) as executor:
+    futures = {executor.submit(fetch_year, year): year for year in range(start_year, end_year)}
 
-    #Identify the unique storm tyes for that year
-    event_types = reports['EVENT_TYPE'].unique()
+    for future in tqdm(as_completed(futures), total=len(futures), desc="Downloading years"):
+        year = futures[future]
+        try:
+            future.result()
+            print(f"Successfully downloaded and processed data for {year}")
 
-    #Add to the main list
-    event_types_by_year.update(event_types)
+        except Exception as e:
+            # If there's an error (e.g., file not found), print a message
+            print(f"Error processing year {year}: {str(e)}")
 
+print("Download process completed.")
 
+#%% Create a single dataframe
 #Create the list of event types which qualify as SCS events
 #Note:- Additional information on the storm reports classification is present here - https://www.ncdc.noaa.gov/stormevents/pd01016005curr.pdf
 SCS_events = ['Hail','High Wind','Strong Wind','Thunderstorm Wind', 'Tornado']
+scs_set = frozenset(SCS_events)
 
-
-#%% Create a single dataframe
+# The event types across the years are collected in the same pass that filters each file,
+# so every yearly CSV is only read once
+event_types_by_year = set()
 combined_scs_report = []
 
 # Subset to SCS Events types (Manually added above) -- CONFIRM TBD
 for year in range(start_year, end_year):
     print(f"{year}...") 
-    reports = pd.read_csv(f"NCEI_Storm_Reports/Storm_Reports_{year}.csv") 
-    filtered_reports = reports[reports['EVENT_TYPE'].isin(SCS_events)]
+    reports = pd.read_csv(f"NCEI_Storm_Reports/Storm_Reports_{year}.csv", dtype={'EVENT_TYPE': 'category'})
+
+    #Add the unique storm types for that year to the main list
+    event_types_by_year.update(reports['EVENT_TYPE'].cat.categories)
+
+    # Match the SCS types against the handful of categories once, then keep rows by their integer codes
+    scs_codes = np.flatnonzero(reports['EVENT_TYPE'].cat.categories.isin(scs_set))
+    keep = np.isin(reports['EVENT_TYPE'].cat.codes.to_numpy(), scs_codes)
+    filtered_reports = reports.loc[keep]
     combined_scs_report.append(filtered_reports)
 
 #Combine the reports
@@ -5,89 +5,194 @@ import io
 import os
 import time
 import sys
+import calendar
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.exceptions import HTTPError as Urllib3Error
 
 url = 'https://spc.noaa.gov/products/outlook/archive/'
 output_dir = 'convective_outlooks'
-os.makedirs(output_dir, exist_ok=True)
+
+# SPC issuance times (UTC) for each outlook day, missing issuances just come back as 404
+FORECAST_TIMES = {
+    1: ['0100', '1200', '1300', '1630', '2000'],
+    2: ['0600', '1730'],
+    3: ['0730'],
+}
+
+# Requests are latency bound, so run them concurrently over one pooled session
+MAX_WORKERS = 16
 
 # This is the same as the read_convective_outlook_api.py the only difference is that
 # You can specify the year month date to start downloading from
 # Or if you leave it blank then it auto detects your directory and see what you need to download for
 # when you left it interrupted and it haven't finished downloading everything
 
-# ─────────────────────────────────────────────────────────────────────────────
-# Parse command-line arguments:
-#
-# - If you call “python3 read_convective_outlook.py 2025 4 7”, sys.argv == ['read_convective_outlook.py', '2025', '4', '7'].
-#   We treat that as: start_year=2025, start_month=4, start_day=7.
-# - If you call “python3 read_convective_outlook.py 2025”, sys.argv == ['read_convective_outlook.py', '2025'].
-#   We treat that as: download only year 2025, starting from Jan 1 of that year.
-# - If you call “python3 read_convective_outlook.py all” (or no args), sys.argv length is 1 or ['read_convective_outlook.py','all'].
-#   We treat that as “download everything (2025 → 2001) starting from Jan 1, 2025.”
-# ─────────────────────────────────────────────────────────────────────────────
-
-start_year = None
-start_month = None
-start_day = None
-
-if len(sys.argv) == 2 and sys.argv[1].lower() != 'all':
-    # Only one numeric argument: that’s the year
+
+def make_session():
+    session = requests.Session()
+    # 429 is what the archive sends when too many requests are in flight, urllib3 waits out its Retry-After
+    retries = Retry(total=5, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504],
+                    respect_retry_after_header=True)
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retries)
+    session.mount('https://', adapter)
+    return session
+
+
+def download_one(session, task):
+    """Download and extract one outlook zip, returns the file name if it failed"""
+    year_use, month_dir, date_script, forecast_day, forecast_time = task
+    forecast_script = f"day{forecast_day}otlk_"
+    filename = f"{forecast_script}{date_script}_{forecast_time}-shp.zip"
+    full_url = f"{url}{year_use:04d}/{filename}"
+
     try:
-        start_year = int(sys.argv[1])
+        with session.get(full_url, timeout=20, stream=True) as response:
+            if response.status_code != 200:
+                # Most issuance times don't exist, reading the short error page lets the connection
+                # go back to the pool, closing it unread would cost a new TLS handshake per 404
+                _ = response.content
+                if response.status_code == 404:
+                    return None
+                print(f"  File not available: {filename} (Status: {response.status_code})")
+                return filename
+
+            # A 200 carrying an HTML page (rate limiting, maintenance) or a stub body is not an
+            # outlook, give up before pulling it into the buffer
+            content_type = response.headers.get('Content-Type', '')
+            content_length = int(response.headers.get('Content-Length') or -1)
+            if content_type.startswith('text/') or 0 <= content_length < 100:
+                print(f"  Not a zip: {filename} ({content_type or 'no content type'}, {content_length} bytes)")
+                return filename
+
+            # Stream the archive into a spooled buffer, small zips stay in memory and big ones spill to disk
+            with tempfile.SpooledTemporaryFile(max_size=4 * 1024 * 1024) as buf:
+                response.raw.decode_content = True
+                shutil.copyfileobj(response.raw, buf)
+                buf.seek(0)
+
+                hour_dir = os.path.join(month_dir, f"forecast_day{forecast_day}",
+                                        f"{forecast_script}{date_script}_{forecast_time}")
+                try:
+                    with zipfile.ZipFile(buf) as z:
+                        os.makedirs(hour_dir, exist_ok=True)
+                        z.extractall(hour_dir)
+                except zipfile.BadZipFile:
+                    # this will error if you are rate limited by the API
+                    print(f"  Failed to extract ZIP for {full_url}")
+                    return filename
+    except (requests.RequestException, Urllib3Error):
+        print(f"  Failed to download: {filename}")
+        return filename
+
+    print(f"  Downloaded and extracted: {hour_dir}")
+    return None
+
+
+if __name__ == "__main__":
+    # ─────────────────────────────────────────────────────────────────────────────
+    # Parse command-line arguments:
+    #
+    # - If you call “python3 read_convective_outlook.py 2025 4 7”, sys.argv == ['read_convective_outlook.py', '2025', '4', '7'].
+    #   We treat that as: start_year=2025, start_month=4, start_day=7.
+    # - If you call “python3 read_convective_outlook.py 2025”, sys.argv == ['read_convective_outlook.py', '2025'].
+    #   We treat that as: download only year 2025, starting from Jan 1 of that year.
+    # - If you call “python3 read_convective_outlook.py all” (or no args), sys.argv length is 1 or ['read_convective_outlook.py','all'].
+    #   We treat that as “download everything (2025 → 2001) starting from Jan 1, 2025.”
+    # ─────────────────────────────────────────────────────────────────────────────
+
+    start_year = None
+    start_month = None
+    start_day = None
+
+    if len(sys.argv) == 2 and sys.argv[1].lower() != 'all':
+        # Only one numeric argument: that’s the year
+        try:
+            start_year = int(sys.argv[1])
+            start_month = 1
+            start_day = 1
+        except ValueError:
+            print(f"Invalid year: {sys.argv[1]}")
+            sys.exit(1)
+
+    elif len(sys.argv) == 4:
+        # Three arguments: year, month, day
+        try:
+            start_year  = int(sys.argv[1])
+            start_month = int(sys.argv[2])
+            start_day   = int(sys.argv[3])
+        except ValueError:
+            print(f"Invalid arguments: {sys.argv[1:]}")
+            sys.exit(1)
+
+    else:
+        # Either “all” or no args → download full range
+        start_year  = None
         start_month = 1
-        start_day = 1
-    except ValueError:
-        print(f"Invalid year: {sys.argv[1]}")
-        sys.exit(1)
+        start_day   = 1
 
-elif len(sys.argv) == 4:
-    # Three arguments: year, month, day
-    try:
-        start_year  = int(sys.argv[1])
-        start_month = int(sys.argv[2])
-        start_day   = int(sys.argv[3])
-    except ValueError:
-        print(f"Invalid arguments: {sys.argv[1:]}")
-        sys.exit(1)
-
-else:
-    # Either “all” or no args → download full range
-    start_year  = None
-    start_month = 1
-    start_day   = 1
-
-if start_year is None:
-    years_to_download = range(2025, 2000, -1)
-else:
-    # If user gave a starting year, run from that year down to 2001
-    years_to_download = range(start_year, 2000, -1)
-
-for year_use in years_to_download:
-    year_dir = os.path.join(output_dir, str(year_use))
-    os.makedirs(year_dir, exist_ok=True)
-
-    #Detect highest existing month-folder under convective_outlooks/<year_use>/
-    existing_months = []
-    for name in os.listdir(year_dir):
-        if name.isdigit():
-            existing_months.append(int(name))
-    if existing_months:
-        first_month_index = max(existing_months) - 1
-        print(f"Resuming Year {year_use} at month {max(existing_months)} (zero‐based index {first_month_index})")
+    if start_year is None:
+        years_to_download = range(2025, 2000, -1)
     else:
-        first_month_index = 0
-        print(f"No existing months for Year {year_use}; starting at month 1")
-
-
-    for month_index in range(first_month_index, 12):
-        month_use = month_index
-        month_dir = os.path.join(year_dir, str(month_use + 1))
-        os.makedirs(month_dir, exist_ok=True)
-
-        for day_index in range(0, 31):
-            date_script = (
-                f"{year_use:04d}"
-                f"{month_index+1:02d}"
-                f"{day_index+1:02d}"
-            )
-            print(f"Processing → Year {year_use}, Month {month_index+1}, Day {day_index+1}")
\ No newline at end of file
+        # If user gave a starting year, run from that year down to 2001
+        years_to_download = range(start_year, 2000, -1)
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Build every (year, month, day, outlook) request up front, then fetch them in parallel
+    tasks = []
+    for year_use in years_to_download:
+        year_dir = os.path.join(output_dir, str(year_use))
+        os.makedirs(year_dir, exist_ok=True)
+
+        #Detect highest existing month-folder under convective_outlooks/<year_use>/
+        with os.scandir(year_dir) as entries:
+            existing_months = [int(e.name) for e in entries if e.is_dir() and e.name.isdigit()]
+        if existing_months:
+            first_month_index = max(existing_months) - 1
+            print(f"Resuming Year {year_use} at month {max(existing_months)} (zero‐based index {first_month_index})")
+        else:
+            first_month_index = 0
+            print(f"No existing months for Year {year_use}; starting at month 1")
+
+
+        for month_index in range(first_month_index, 12):
+            month_use = month_index
+            month_dir = os.path.join(year_dir, str(month_use + 1))
+            os.makedirs(month_dir, exist_ok=True)
+
+            # Only the days that exist in this month, no guaranteed 404s for Feb 30 etc
+            ndays = calendar.monthrange(year_use, month_index + 1)[1]
+            for day_index in range(ndays):
+                date_script = (
+                    f"{year_use:04d}"
+                    f"{month_index+1:02d}"
+                    f"{day_index+1:02d}"
+                )
+                print(f"Processing → Year {year_use}, Month {month_index+1}, Day {day_index+1}")
+
+                for forecast_day, forecast_times in FORECAST_TIMES.items():
+                    for forecast_time in forecast_times:
+                        hour_dir = os.path.join(month_dir, f"forecast_day{forecast_day}",
+                                                f"day{forecast_day}otlk_{date_script}_{forecast_time}")
+                        # Skip anything already extracted by an earlier (interrupted) run
+                        if os.path.isdir(hour_dir) and os.listdir(hour_dir):
+                            continue
+                        tasks.append((year_use, month_dir, date_script, forecast_day, forecast_time))
+
+    print(f"{len(tasks)} outlook files to request")
+
+    session = make_session()
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        failures = [f for f in ex.map(lambda t: download_one(session, t), tasks) if f]
+
+    if failures:
+        with open('file_read_errors.txt', 'w') as file:
+            for item in failures:
+                file.write(f"{item}\n")
+        print(f"  Error log written: file_read_errors.txt ({len(failures)} files)")
+
+    print("Download completed!")
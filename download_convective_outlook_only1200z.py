@@ -4,98 +4,122 @@ Only downloading day1otlk folders/filers also
 From 2024 to 2010 inclusive because somehow earlier than that there's nothing to download
 """
 
-import requests
+import asyncio
+import aiohttp
 import csv
 import zipfile
-import io
 import os
-import time
+import tempfile
+import pandas as pd
+from collections import defaultdict
 
 url = 'https://spc.noaa.gov/products/outlook/archive/'
 # create directory to store downloaded data files
 output_dir = 'convective_outlooks_only1200z'
 os.makedirs(output_dir, exist_ok=True)
 
-# loop through all the pages in the archive
-for year_use in range(2024, 2009, -1):
-    year_dir = os.path.join(output_dir, str(year_use))
-    os.makedirs(year_dir, exist_ok=True)
+# Every day is an independent request, so they are all scheduled on one event loop
+# over a single keep-alive session, with at most MAX_CONCURRENT requests in flight
+MAX_CONCURRENT = 64
+MAX_RETRIES = 5
+
+# Only process forecast_day1 (forecast_day = 0)
+forecast_day = 0
+forecast_script = 'day' + str(forecast_day + 1) + 'otlk_'
+
+# Only process 12:00 (forecast_time = 12, minute_use = '00')
+forecast_time = 12
+minute_use = '00'
+forecast_check_top = str(forecast_time).zfill(2) + minute_use  # This creates '1200'
+
+# build the list of days to download up front (newest first), days that were already extracted are skipped.
+# pd.date_range only yields real dates, so there are no requests for Feb 30 etc
+dates = pd.date_range('2010-01-01', '2024-12-31', freq='D')[::-1]
+date_scripts = dates.strftime('%Y%m%d')
+filenames = [f"{forecast_script}{d}_{forecast_check_top}-shp.zip" for d in date_scripts]
+full_urls = [f"{url}/{d[:4]}/{filename}" for d, filename in zip(date_scripts, filenames)]
+
+tasks = []
+for date, date_script, filename, full_url in zip(dates, date_scripts, filenames, full_urls):
+    forecast_dir = os.path.join(output_dir, str(date.year), str(date.month), 'forecast_day' + str(forecast_day + 1))
+    hour_dir = os.path.join(forecast_dir, f"{forecast_script}{date_script}_{forecast_check_top}")
     
-    for month_use in range(0, 12):
-        month_dir = os.path.join(year_dir, str(month_use + 1))
-        os.makedirs(month_dir, exist_ok=True)
-        file_read_failure = []
-        
-        for day_use in range(0, 31):
-            date_script = str(year_use).zfill(4) + str(month_use + 1).zfill(2) + str(day_use + 1).zfill(2)
-            print(f"Processing: {year_use} {month_use + 1} {day_use + 1}")
-            
-            # Only process forecast_day1 (forecast_day = 0)
-            forecast_day = 0
-            forecast_script = 'day' + str(forecast_day + 1) + 'otlk_'
-            
-            # Only process 12:00 (forecast_time = 12, minute_use = '00')
-            forecast_time = 12
-            minute_use = '00'
-            forecast_check_top = str(forecast_time).zfill(2) + minute_use  # This creates '1200'
-            
-            full_url = url + '/' + str(year_use).zfill(4) + '/' + forecast_script + date_script + '_' + forecast_check_top + '-shp.zip'
-            
-            # for each page, make a new request to the API
-            file_found = True
+    # Check if files already exist to avoid re-downloading
+    if os.path.isdir(hour_dir) and os.listdir(hour_dir):
+        print(f"  Skipping {hour_dir} - files already exist")
+        continue
+    
+    os.makedirs(forecast_dir, exist_ok=True)
+    tasks.append((date.year, date.month, date.day, full_url, hour_dir, filename))
+
+def extract_zip(zip_file, hour_dir):
+    """Extract a downloaded outlook ZIP, raises zipfile.BadZipFile if it is not one"""
+    z = zipfile.ZipFile(zip_file)
+    os.makedirs(hour_dir, exist_ok=True)
+    z.extractall(hour_dir)
+
+async def fetch_day(session, semaphore, task):
+    """Download and extract one day's outlook, returns (task, status, message)"""
+    year_use, month, day, full_url, hour_dir, filename = task
+    
+    async with semaphore:
+        for retry in range(MAX_RETRIES):
             try:
-                response = requests.get(full_url)
-            except:
-                file_found = False
-                
-            if response.status_code == 200 and file_found:
-                file_found = True
-                try:
-                    z = zipfile.ZipFile(io.BytesIO(response.content))
-                except:
-                    # this will error if you are rate limited by the API
-                    # (in which case increase time.sleep(X) value of X)
-                    file_found = False
-                    print(f"  Failed to extract ZIP for {full_url}")
+                async with session.get(full_url) as response:
+                    rate_limited = response.status == 429
+                    if not rate_limited:
+                        if response.status != 200:
+                            # File not found (404) or other error
+                            return task, 'missing', f"  File not available: {filename} (Status: {response.status})"
+                        
+                        # Stream the ZIP into a spooled temp file (in memory up to 8 MB, on disk past that),
+                        # extraction runs on a worker thread so the event loop keeps downloading
+                        with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as tf:
+                            async for chunk in response.content.iter_chunked(1 << 16):
+                                tf.write(chunk)
+                            tf.seek(0)
+                            
+                            try:
+                                await asyncio.to_thread(extract_zip, tf, hour_dir)
+                            except zipfile.BadZipFile:
+                                return task, 'failed', f"  Failed to extract ZIP for {full_url}"
+                        return task, 'downloaded', f"  Downloaded and extracted: {hour_dir}"
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                return task, 'failed', f"  Failed to download: {filename}"
             
-                # if data exists, store in directory
-                if file_found:
-                    forecast_dir = os.path.join(month_dir, 'forecast_day' + str(forecast_day + 1))
-                    hour_dir = os.path.join(forecast_dir, forecast_script + date_script + '_' + forecast_check_top)
-                    os.makedirs(forecast_dir, exist_ok=True)
-                    os.makedirs(hour_dir, exist_ok=True)
-                    
-                    # Check if files already exist to avoid re-downloading
-                    existing_files = os.listdir(hour_dir)
-                    if existing_files:
-                        print(f"  Skipping {hour_dir} - files already exist")
-                    else:
-                        z.extractall(hour_dir)
-                        print(f"  Downloaded and extracted: {hour_dir}")
-                else:
-                    # make note of any file that did not download
-                    filename = forecast_script + date_script + '_' + forecast_check_top + '-shp.zip'
-                    file_read_failure.append(filename)
-                    print(f"  Failed to download: {filename}")
-            else:
-                # File not found (404) or other error
-                filename = forecast_script + date_script + '_' + forecast_check_top + '-shp.zip'
-                print(f"  File not available: {filename} (Status: {response.status_code if 'response' in locals() else 'No response'})")
-                
-            # Add small delay to be respectful to the server
-            #time.sleep(0.5)
-        
-        # Write error log for each month
-        if file_read_failure:
-            error_file = f'file_read_errors_{year_use}_{month_use + 1}.txt'
-            with open(error_file, 'w') as file:
-                for item in file_read_failure:
-                    file.write(f"{item}\n")
-            print(f"  Error log written: {error_file}")
-        
-        print(f"Completed month {month_use + 1} of year {year_use}")
-        
-    print(f"Completed year {year_use}")
-    #time.sleep(2)  # Longer delay between years
+            # rate limited by the API, back off and try again
+            await asyncio.sleep(2 ** retry)
+    
+    return task, 'failed', f"  Failed to download: {filename} (rate limited)"
+
+async def download_all(tasks):
+    """Fetch every day concurrently, returns the failed filenames per (year, month)"""
+    file_read_failure = defaultdict(list)
+    
+    timeout = aiohttp.ClientTimeout(total=60)
+    connector = aiohttp.TCPConnector(limit=MAX_CONCURRENT)
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        for next_done in asyncio.as_completed([fetch_day(session, semaphore, task) for task in tasks]):
+            task, status, message = await next_done
+            year_use, month, day, full_url, hour_dir, filename = task
+            print(f"Processed: {year_use} {month} {day}")
+            print(message)
+            
+            # make note of any file that did not download
+            if status == 'failed':
+                file_read_failure[(year_use, month)].append(filename)
+    
+    return file_read_failure
+
+file_read_failure = asyncio.run(download_all(tasks))
+
+# Write error log for each month
+for (year_use, month), failures in sorted(file_read_failure.items()):
+    error_file = f'file_read_errors_{year_use}_{month}.txt'
+    with open(error_file, 'w') as file:
+        for item in sorted(failures):
+            file.write(f"{item}\n")
+    print(f"  Error log written: {error_file}")
 
-print("Download completed!")
\ No newline at end of file
+print("Download completed!")
@@ -1,9 +1,12 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 import csv
-import time
+import io
 import os
 import pandas as pd
 import numpy as np
+import pyarrow.parquet as pq
 
 url = 'https://spc.noaa.gov/climo/reports/'
 os.makedirs('daily_reports/tornado_reports', exist_ok = True)
@@ -13,19 +16,20 @@ storm_types = ['torn', 'hail', 'wind',]
 #SCS_events = ['Hail','High Wind','Strong Wind','Thunderstorm Wind', 'Tornado']
 storm_dir_names = ['daily_reports/tornado_reports', 'daily_reports/wind_reports', 'daily_reports/hail_reports']
 default_header = ['Time', 'F-Scale', 'Location', 'County', 'State', 'Lat', 'Lon', 'Comments']
-retry_counter = 0
+# one pooled session for every request, rate limits and server errors are retried with backoff by urllib3
+session = requests.Session()
+session.mount('https://', HTTPAdapter(max_retries=Retry(total=5, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])))
 current_year = 25
 current_month = 4
 for year_use in range(25, 3, -1):
   for month_use in range(0, 12):
     monthly_vals = {}
-    monthly_vals['torn'] = pd.DataFrame()
-    monthly_vals['hail'] = pd.DataFrame()
-    monthly_vals['wind'] = pd.DataFrame()
+    daily_buf = {t: [] for t in storm_types}
     for storm_type, stm_dir in zip(storm_types, storm_dir_names):
+      # monthly files are parquet, a finished month is detected from the row count in the file metadata without reading it
+      month_file = os.path.join(stm_dir, storm_type + '_' + str(month_use + 1) + '_20' + str(year_use).zfill(2) + '.parquet')
       try:
-        old_file = pd.read_csv(os.path.join(stm_dir, storm_type + '_' + str(month_use + 1) + '_20' + str(year_use).zfill(2) + '.csv'))
-        if len(old_file.index) > 0:
+        if pq.ParquetFile(month_file).metadata.num_rows > 0:
           read_month = False
         else:
           read_month = True
@@ -36,28 +40,22 @@ for year_use in range(25, 3, -1):
       elif year_use > current_year:
         read_month = False
       if read_month:          
-        for day_use in range(0, 31):
-          date_script = str(year_use).zfill(2) + str(month_use + 1).zfill(2) + str(day_use + 1).zfill(2)
+        # every real date of the month formatted in one call (yymmdd), the day's URL is built from it
+        month_start = pd.Timestamp(2000 + year_use, month_use + 1, 1)
+        date_scripts = pd.date_range(month_start, month_start + pd.offsets.MonthEnd(0), freq='D').strftime('%y%m%d')
+        day_urls = [url + d + '_rpts_' + storm_type + '.csv' for d in date_scripts]
+        for day_use, (date_script, day_url) in enumerate(zip(date_scripts, day_urls)):
           try:
-            response = requests.get(url + date_script + '_rpts_' + storm_type + '.csv')
-            retry_counter = 0
-          except:
-            retry_counter += 1
-          if retry_counter > 0:
-            while retry_counter < 5:
-              print('sleeping before try number ' + str(retry_counter + 1) + ' of 5')
-              time.sleep(60 * retry_counter)
-              try:
-                response = requests.get(url + date_script + '_rpts_' + storm_type + '.csv')
-                retry_counter = 5
-              except:
-                retry_counter += 1
+            response = session.get(day_url, timeout=15)
+          except requests.RequestException:
+            print('failed to read ' + date_script + ' ' + storm_type + ' after 5 retries')
+            continue
           if response.status_code == 200:
             decoded_content = response.content.decode('utf-8')
-            cr = csv.reader(decoded_content.splitlines(), delimiter=',')
-            storm_report_df = pd.DataFrame(cr)
-            if len(storm_report_df.index) > 0:
-              potential_columns = storm_report_df.iloc[0]
+            lines = decoded_content.splitlines()
+            if len(lines) > 0:
+              # peek at the first row once to tell a header row from a data row
+              potential_columns = next(csv.reader(lines[:1], delimiter=','))
               use_default = False
               for col_use in potential_columns:
                 try:
@@ -65,24 +63,24 @@ for year_use in range(25, 3, -1):
                   use_default = True
                 except:
                   pass
+              # rows are ragged when comments carry extra commas, so the frame is made wide enough for the longest one
+              # empty fields and text like "NA" stay strings as they did with csv.reader, only absent fields are NaN
+              n_cols = max(line.count(',') for line in lines) + 1
+              storm_report_df = pd.read_csv(io.StringIO(decoded_content), header=None, names=range(n_cols), dtype=str,
+                                            keep_default_na=False)
               if use_default:
-                drop_list = []
+                # comments split over the extra columns are joined back into column 7 in one pass
                 if len(storm_report_df.columns) > 8:
-                  for colx in range(8, len(storm_report_df.columns)):
-                    storm_report_df[storm_report_df.columns[7]] = storm_report_df[storm_report_df.columns[7]] + storm_report_df[storm_report_df.columns[colx]]
-                    drop_list.append(storm_report_df.columns[colx])
-                  storm_report_df = storm_report_df.drop(columns = drop_list)
+                  storm_report_df[storm_report_df.columns[7]] = storm_report_df.iloc[:, 7:].fillna('').agg(''.join, axis=1)
+                  storm_report_df = storm_report_df.iloc[:, :8]
                 storm_report_df.columns = default_header
               else:
-                storm_report_df.columns = storm_report_df.iloc[0]
-                storm_report_df = storm_report_df[1:]
+                storm_report_df = storm_report_df.iloc[1:, :len(potential_columns)]
+                storm_report_df.columns = potential_columns
               storm_report_df['Day'] = np.ones(len(storm_report_df.index)) * (day_use+1)
-              try:
-                storm_report_df = storm_report_df.drop(columns=[None])
-              except:
-                pass
-              monthly_vals[storm_type] = pd.concat([monthly_vals[storm_type], storm_report_df])
-              monthly_vals[storm_type] = monthly_vals[storm_type].reset_index(drop = True)
-        monthly_vals[storm_type].to_csv(os.path.join(stm_dir, storm_type + '_' + str(month_use + 1) + '_20' + str(year_use).zfill(2) + '.csv'))
+              daily_buf[storm_type].append(storm_report_df)
+        # one concat per month instead of one per day
+        monthly_vals[storm_type] = pd.concat(daily_buf[storm_type], ignore_index=True) if daily_buf[storm_type] else pd.DataFrame()
+        monthly_vals[storm_type].to_parquet(month_file, index=False)
         print(str(len(monthly_vals[storm_type].index)) + ' ' + storm_type + ' entries on : 20' + str(year_use).zfill(2) + ' ' + str(month_use + 1))
 